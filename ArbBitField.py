@@ -1,261 +1,451 @@
-#! /usr/bin/env python
-# encoding: utf-8
-"""
-    ArbBitField implements a class for handling bitfields as text.
-    Say you have a serial hardware device with dozens, or hundreds of individual
-    bitfields of various widths, each controlling or indicating some function of the hardware.
-    A JTAG interface to a JESD-204B DAC, for example. Manipulating all those
-    bitfields can be quite error-prone since they might only randomly line up
-    on nibble (4 bit) boundaries. ArbBitField provides
-        Methods to define, modify, and display the fields.
-        Methods to easily read from and write to the hardware: set_bool and get_bool .
-        Options to reverse the bits within a field and/or the fields in the sequence
-            during input and output.
-    The key to the ArbBitField class is the format string. The format string defines
-    the widths of the individual bit fields.
-    Example using 4 fields, each 3 bits wide:
-        >>> foo = ArbBitField.ArbBitField('3333')
-        >>> foo
-        ArbBitField('3333','0000')
-        >>> str(foo)
-        '000 000 000 000'
-        >>> foo[1:3] = '35'
-        >>> str(foo)
-        '000 011 101 000'
-        >>> foo.bool()
-        [False, False, False, False, True, True, True, False, True, False, False, False]
-        >>> foo.set_bool([False,True,False]*4)
-        >>> foo
-        ArbBitField('4444','2222')
-        >>> foo.value
-        '2222'
-    Fields can be any cobination from 1 to 5 bits wide.
-    Zero width makes no sense, so is illegal.
-    Though widths of 5 are legal, it's usually easier to read in 4 bit nibbles,
-        e.g. if you specify a 5 bit thing as '14' and set it to all 1s, it reads '1F'.
-        if you specify the width as '5', then all 1s reads 'V' which is (31-10)
-        characters after 'A' - not so useful.
-"""
-
-import copy
-
-class ArbBitField(object):
-    """ Arbitrary bit field representation: class string of chars organized by a format line.
-    The format line indicates the widths of each of the field that makes up the instance.
-    Default ordering left-to-right is MSB to LSB.
-    """
-    def __init__(self, fmt, val=None):
-        """ The only required arg is the widths of the fields: the format.
-            Characters in the format indicate how many bits to group together...
-            Essentially, the base of the field.
-            Legal value characters are 1..9, A..V (case insensitive)
-            Legal format characters are 1..5
-            NB: 16 bits is represented by 'G', not 'H'.
-            Slices are partially supported (field-wise) but not the slice step
-        """
-        assert not '0' in fmt       # zero-length field is probably a mistake
-        ArbBitField.legalValChars = ['%d'%x for x in range(10)]
-        ArbBitField.legalValChars += ['%s'%chr(x+ord('A')) for x in range(16)]
-        ArbBitField.legalFmtChars = ['%d'%x for x in range(1, 6)]
-        self.fmt = ''.join([x for x in fmt.upper() if x in ArbBitField.legalFmtChars])
-        self.val = self._clean_val_(val)
-
-    def _clean_val_(self, val):
-        """ returns a text str of legal charss in val that is the same length as fmt
-        """
-        if val is None:
-            val = ''
-        else:
-            val = ''.join([x for x in val.upper() if x in ArbBitField.legalValChars])
-        val = val[:len(self.fmt)]                       # truncate to fmt length
-        val = val + '0'*(len(self.fmt)-len(val))     # pad the val out to the len of fmt
-        return val
-
-    def set_val(self, val):
-        """ property setter
-        """
-        self.val = self._clean_val_(val)
-
-    def get_val(self):
-        """ property getter
-        """
-        return self.val
-
-    value = property(get_val, set_val)
-
-    @staticmethod
-    def _field_to_int_(field):
-        """ field MUST be 1 digit or upper case char. Internal use.
-        """
-        assert len(field) == 1
-        if field in ''.join(['%d'%x for x in range(10)]):
-            count = int(field)
-        else:
-            count = 10 + ord(field) - ord('A')
-        return count
-
-    @staticmethod
-    def _to_int_(field):
-        """ support lists but still return a single int if that's what's passed
-            field may be a slice. Internal use.
-        """
-        if len(field) == 1:
-            ret = ArbBitField._field_to_int_(field)
-        else:
-            ret = [ArbBitField._field_to_int_(x) for x in field]
-        return ret
-
-    @staticmethod
-    def _to_char_(val):
-        """ v is str of binary such as "00101" which returns "5". Internal Use.
-        """
-        vint = sum([(1 << bit_n) if val_c == '1' else 0 for bit_n, val_c in enumerate(val[::-1])])
-        offset = ord('A')-10 if vint > 9 else ord('0')
-        tmp = chr(vint+offset)
-        if ArbBitField.debug:
-            print '-- debug _to_char_("%s")  vint %d, offset %d, char %s'%(val, vint, offset, tmp)
-            if vint > 36:
-                print 'vint', vint
-                assert False
-        return tmp
-
-    @staticmethod
-    def _to_bin_(val_c, fmt_c, rev_bits=False):
-        """ Single char conversion for internal use.
-            e.g. '5' in format '6' is '000101' (padded to fmt_c size)
-        """
-        assert len(val_c) == 1
-        assert len(fmt_c) == 1
-        count = ArbBitField._to_int_(fmt_c)
-        # print 'f is %r  count is %r'%(f,count)
-        tmp = ArbBitField._to_int_(val_c)
-        if rev_bits:                                            # reverse is LSB to MSB
-            val_ret = ''.join(str(1 & tmp >> bit_n) for bit_n in range(count))
-        else:                                                   # normal is MSB to LSB
-            val_ret = ''.join(str(1 & tmp >> bit_n) for bit_n in range(count)[::-1])
-        if ArbBitField.debug:
-            print '-- _to_bin_("%s","%s",%r)'%(val_c, fmt_c, rev_bits),
-            print 'count=%d, tmp=%r, val_c=%s'%(count, tmp, val_ret)
-        return val_ret
-
-    def __str__(self):
-        """ Returns the value bits as 1s and 0s, grouped with space chars,
-            e.g. zero in '34' format is '000 0000'
-        """
-        assert len(self.val) == len(self.fmt)   # depends on fmt and val being the same length.
-        return ' '.join([self._to_bin_(*vftup) for vftup in zip(self.val, self.fmt)])
-
-    def __repr__(self):
-        """ Return str that eval can use to re-create the object.
-        """
-        return "ArbBitField('"+self.fmt+"','"+self.val+"')"
-
-    def __add__(self, rhs):
-        """ Concatenates two arb bit objects with all format and val.
-        """
-        ret = copy.copy(self)
-        ret.fmt = ret.fmt + rhs.fmt
-        ret.val = ret.val + rhs.val
-        return ret
-
-    def __getitem__(self, key):
-        return ArbBitField._to_int_(self.val[key])
-
-    def __setitem__(self, key, val_c):
-        tmp = bytearray(self.val)
-        assert len(tmp[key]) == len(val_c)
-        tmp[key] = val_c
-        self.val = str(tmp)
-
-    def __len__(self):
-        return len(self.fmt)
-
-    def bool(self, rev_bits=False, rev_fields=False):
-        """ returns a list of bools; Options to reverse bit-wise and field-wise.
-            Normal order is left to right fields and MSB to LSB bits
-        """
-        if rev_fields:
-            tmp_fmt, tmp_val = self.fmt[::-1], self.val[::-1]
-        else:
-            tmp_fmt, tmp_val = self.fmt[::], self.val[::]
-        ret = []
-        for fmt_idx, fmt_c in enumerate(tmp_fmt):
-            count = ArbBitField._to_int_(fmt_c)
-            if rev_bits:                 # reverse is LSB to MSB
-                ret += [bool(1 & ArbBitField._to_int_(tmp_val[fmt_idx]) >> c) for c in range(count)]
-            else:                       # normal is MSB to LSB
-                ret += [bool(1 & ArbBitField._to_int_(tmp_val[fmt_idx]) >> c)
-                        for c in range(count)[::-1]]
-        return ret
-
-
-    def set_bool(self, b_lst, rev_bits=False, rev_fields=False):
-        """ sets val from a list of bools (read from the hardware, e.g.)
-            Normal input order is left to right fields and MSB to LSB bits
-        """
-        if rev_fields:
-            tmp_fmt = self.fmt[::-1]
-        else:
-            tmp_fmt = self.fmt[::]
-        vstr = ''
-        tmp_val = ['%s'%('1' if x else '0') for x in b_lst]   # convert bools to chars, if needed
-        offset = 0
-        for fmt_c in tmp_fmt:
-            count = ArbBitField._to_int_(fmt_c)
-            if rev_bits:
-                vstr = vstr + ArbBitField._to_char_(tmp_val[offset:offset+count][::-1])
-            else:
-                vstr = vstr + ArbBitField._to_char_(tmp_val[offset:offset+count])
-            offset += count
-            if ArbBitField.debug:
-                print '-- debug set_bool("%s")'%(tmp_val), count, vstr, offset
-        self.val = vstr[::-1] if rev_fields else vstr
-
-ArbBitField.debug = False
-
-def bool_to_str(b_lst, zero_val=' '):
-    """  Handy formatter from list of bools to text
-    """
-    return ''.join(['%s'%('1' if b_val else zero_val) for b_val in b_lst])
-
-if __name__ == '__main__':
-    print '*'*72
-    print '*'*30, 'Begin Test', '*'*30
-    print '*'*72
-    X = ArbBitField('34', '31')
-    Y = ArbBitField('55', '5b')
-    Z = X+Y
-
-    print 'X %30s'%X, '%r'%X
-    print 'Y %30s'%Y, '%r'%Y
-    print 'Z %30s'%Z, '%r'%Z
-    print 'Z[1:3] %25s'%Z[1:3], '%r'%Z
-    Z[1:3] = '24'
-    print 'put 24 inthe middle of Z:'
-    print 'Z %30s'%Z, repr(Z)
-
-    print 'Z in decimal:', ' '.join(['%d'%Z[i] for i in range(len(Z))])
-    print '\nY %30s'%Y, '%r'%Y
-
-
-    print bool_to_str(Y.bool())
-    print bool_to_str(Y.bool(rev_bits=True)), 'Y rev_bits'
-    print bool_to_str(Y.bool(rev_fields=True)), 'Y rev_fields'
-    print bool_to_str(Y.bool(rev_fields=True, rev_bits=True)), 'Y both'
-
-    T = ArbBitField('34', '3b')
-    T_SET = [False, False, True, True, True, False, True,]
-    print ''.join(['%s'%('1' if i else '0') for i in T_SET]), 'T_SET'
-    T.set_bool(T_SET)
-    print 'T %30s'%T, '%r'%T
-    T.set_bool(T_SET, rev_bits=True)
-    print 'T %30s'%T, '%r'%T, 'bits'
-    T.set_bool(T_SET, rev_fields=True)
-    print 'T %30s'%T, '%r'%T, 'fields'
-    T.set_bool(T_SET, rev_fields=True, rev_bits=True)
-    print 'T %30s'%T, '%r'%T, 'both'
-    T.set_bool(T_SET)
-    print 'T %30s'%T, '%r'%T, 'none'
-
-    ArbBitField.debug = False
-    print '-'*30, ' test done', '-'*30
+#! /usr/bin/env python
+# encoding: utf-8
+"""
+    ArbBitField implements a class for handling bitfields as text.
+    Say you have a serial hardware device with dozens, or hundreds of individual
+    bitfields of various widths, each controlling or indicating some function of the hardware.
+    A JTAG interface to a JESD-204B DAC, for example. Manipulating all those
+    bitfields can be quite error-prone since they might only randomly line up
+    on nibble (4 bit) boundaries. ArbBitField provides
+        Methods to define, modify, and display the fields.
+        Methods to easily read from and write to the hardware: set_bool and get_bool .
+        Options to reverse the bits within a field and/or the fields in the sequence
+            during input and output.
+    The key to the ArbBitField class is the format string. The format string defines
+    the widths of the individual bit fields.
+    Example using 4 fields, each 3 bits wide:
+        >>> foo = ArbBitField.ArbBitField('3333')
+        >>> foo
+        ArbBitField('3333','0000')
+        >>> str(foo)
+        '000 000 000 000'
+        >>> foo[1:3] = '35'
+        >>> str(foo)
+        '000 011 101 000'
+        >>> foo.bool()
+        [False, False, False, False, True, True, True, False, True, False, False, False]
+        >>> foo.set_bool([False,True,False]*4)
+        >>> foo
+        ArbBitField('4444','2222')
+        >>> foo.value
+        '2222'
+    Fields can be any cobination from 1 to 5 bits wide.
+    Zero width makes no sense, so is illegal.
+    Though widths of 5 are legal, it's usually easier to read in 4 bit nibbles,
+        e.g. if you specify a 5 bit thing as '14' and set it to all 1s, it reads '1F'.
+        if you specify the width as '5', then all 1s reads 'V' which is (31-10)
+        characters after 'A' - not so useful.
+"""
+
+
+import os
+
+import numpy as np
+
+if os.environ.get('ARBBF_DISABLE_FAST'):
+    _fast = None                # forced pure-Python, e.g. to compare paths
+else:
+    try:
+        import _fast            # optional C accelerator; see setup.py
+    except ImportError:
+        _fast = None
+
+# Character <-> integer lookups, built once at import.
+# Legal value chars cover 0..9 then A..V (5 bit fields can hold up to 31).
+_DIGITS = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+_CHAR_TO_INT = dict((c, v) for v, c in enumerate(_DIGITS[:32]))
+_LEGAL_VAL = frozenset(_CHAR_TO_INT)
+_LEGAL_FMT = frozenset('12345')
+# One-pass value cleaner: uppercase the legal chars, delete the rest.
+_VAL_UPPER = bytes.maketrans(_DIGITS[:32].lower().encode(), _DIGITS[:32].encode())
+_VAL_JUNK = bytes(b for b in range(256) if chr(b).upper() not in _LEGAL_VAL)
+# Whole-string char<->int translation, one C pass instead of a dict
+# lookup (or _DIGITS index) per char.
+_CHARS_TO_INTS = bytes.maketrans(_DIGITS[:32].encode(), bytes(range(32)))
+_INTS_TO_CHARS = bytes.maketrans(bytes(range(32)), _DIGITS[:32].encode())
+
+# Ready-made binary strings: _BIN_TABLE[width][value] is value as width bits,
+# MSB first.  _BIN_TABLE_REV holds the LSB-first variants for rev_bits.
+_BIN_TABLE = [[format(v, '0%db'%w) for v in range(1 << w)] for w in range(6)]
+_BIN_TABLE_REV = [[s[::-1] for s in row] for row in _BIN_TABLE]
+# A value wider than its field is silently truncated to the low bits,
+# so mask before any table lookup.
+_WIDTH_MASK = tuple((1 << w) - 1 for w in range(6))
+# Inverse of _CHAR_TO_INT: 0..9 then A..Z, indexed by field value.
+_INT_TO_CHAR = _DIGITS
+# Column indices of an unpacked 8-bit lane; compared against the field
+# widths to mask off the unused bits of each lane.
+_BIT_COLS = np.arange(8, dtype=np.uint8)
+# _REV8[b] is byte b with its 8 bits mirrored; indexing an array of
+# values through it reverses every lane at once, no per-field branch.
+_REV8 = np.array([int(format(b, '08b')[::-1], 2) for b in range(256)], dtype=np.uint8)
+_WIDTH_MASK_ARR = np.array(_WIDTH_MASK, dtype=np.uint8)
+
+# One generated renderer per unique format string; a typical session
+# only ever sees a handful of formats, so the cache stays tiny.
+_STR_FUNCS = {}
+
+def _make_str_func_(widths):
+    """ eval up a renderer specialized to one sequence of widths, with the
+        table lookups and masks baked in as constants,
+        e.g. widths (3, 4) gives
+        lambda v: '%s %s' % (_BIN_TABLE[3][v[0] & 7], _BIN_TABLE[4][v[1] & 15])
+    """
+    if not len(widths):
+        return lambda v: ''
+    parts = ['_BIN_TABLE[%d][v[%d] & %d]' % (w, idx, _WIDTH_MASK[w])
+             for idx, w in enumerate(widths)]
+    src = "lambda v: '%s' %% (%s,)" % (' '.join(['%s'] * len(parts)), ', '.join(parts))
+    return eval(src, {'_BIN_TABLE': _BIN_TABLE})
+
+class ArbBitField:
+    """ Arbitrary bit field representation: class string of chars organized by a format line.
+    The format line indicates the widths of each of the field that makes up the instance.
+    Default ordering left-to-right is MSB to LSB.
+    """
+    __slots__ = ('fmt', '_widths', '_widths_sum', '_widths_rev',
+                 '_lane_mask', '_lane_mask_rev', '_vals', '_val_str')
+
+    def __init__(self, fmt, val=None):
+        """ The only required arg is the widths of the fields: the format.
+            Characters in the format indicate how many bits to group together...
+            Essentially, the base of the field.
+            Legal value characters are 1..9, A..V (case insensitive)
+            Legal format characters are 1..5
+            NB: 16 bits is represented by 'G', not 'H'.
+            Slices are partially supported (field-wise) but not the slice step
+        """
+        assert not '0' in fmt       # zero-length field is probably a mistake
+        self.fmt = ''.join(x for x in fmt.upper() if x in _LEGAL_FMT)
+        self._widths = np.fromiter((_CHAR_TO_INT[x] for x in self.fmt),
+                                   dtype=np.uint8, count=len(self.fmt))
+        self._widths_sum = int(self._widths.sum())      # total bits
+        self._init_fmt_caches_()
+        self.val = self._clean_val_(val)
+
+    def _init_fmt_caches_(self):
+        """ format-derived caches shared by the hot paths: the reversed
+            widths and the lane masks, so rev_fields costs no per-call
+            reversal or mask rebuild
+        """
+        self._widths_rev = self._widths[::-1]
+        self._lane_mask = _BIT_COLS < self._widths[:, None]
+        self._lane_mask_rev = _BIT_COLS < self._widths_rev[:, None]
+
+    def _clean_val_(self, val):
+        """ returns a text str of legal charss in val that is the same length as fmt
+        """
+        if val is None:
+            val = ''
+        else:
+            # single C-level translate replaces the upper() copy plus
+            # the per-char membership filter
+            val = val.encode('ascii', 'ignore').translate(_VAL_UPPER, _VAL_JUNK).decode('ascii')
+        val = val[:len(self.fmt)]                       # truncate to fmt length
+        val = val + '0'*(len(self.fmt)-len(val))     # pad the val out to the len of fmt
+        return val
+
+    def set_val(self, val):
+        """ property setter
+        """
+        self.val = self._clean_val_(val)
+
+    def get_val(self):
+        """ property getter
+        """
+        return self.val
+
+    value = property(get_val, set_val)
+
+    def _set_raw_val_(self, val):
+        """ backing setter for val; the uint8 array is the real storage
+            and the text form is rebuilt lazily on demand.
+        """
+        self._vals = np.frombuffer(bytearray(val.encode('ascii').translate(_CHARS_TO_INTS)),
+                                   dtype=np.uint8)
+        self._val_str = None
+
+    def _get_raw_val_(self):
+        """ backing getter for val
+        """
+        if self._val_str is None:
+            self._val_str = self._vals.tobytes().translate(_INTS_TO_CHARS).decode('ascii')
+        return self._val_str
+
+    val = property(_get_raw_val_, _set_raw_val_)
+
+    @staticmethod
+    def _field_to_int_(field):
+        """ field MUST be 1 digit or upper case char. Internal use.
+        """
+        return _CHAR_TO_INT[field]
+
+    @staticmethod
+    def _to_char_(val):
+        """ val is a str (or list of chars) of binary such as "00101" which returns "5".
+            Internal Use.
+        """
+        return _INT_TO_CHAR[int(val if isinstance(val, str) else ''.join(val), 2)]
+
+    @staticmethod
+    def _to_bin_(val_c, fmt_c, rev_bits=False):
+        """ Single char conversion for internal use.
+            e.g. '5' in format '5' is '00101' (padded to fmt_c size)
+        """
+        assert len(val_c) == 1
+        assert len(fmt_c) == 1
+        if fmt_c not in _LEGAL_FMT:     # same answer with or without _fast
+            raise ValueError('field width must be 1..5, got %r' % fmt_c)
+        count = _CHAR_TO_INT[fmt_c]
+        if _fast is not None:
+            return _fast.to_bin(count, _CHAR_TO_INT[val_c], rev_bits)
+        table = _BIN_TABLE_REV if rev_bits else _BIN_TABLE
+        return table[count][_CHAR_TO_INT[val_c] & _WIDTH_MASK[count]]
+
+    def __str__(self):
+        """ Returns the value bits as 1s and 0s, grouped with space chars,
+            e.g. zero in '34' format is '000 0000'
+        """
+        if _fast is not None:
+            return _fast.render_str(self._widths, self._vals)
+        try:
+            render = _STR_FUNCS[self.fmt]
+        except KeyError:
+            render = _STR_FUNCS[self.fmt] = _make_str_func_(self._widths)
+        return render(self._vals)
+
+    def __repr__(self):
+        """ Return str that eval can use to re-create the object.
+        """
+        return "ArbBitField('"+self.fmt+"','"+self.val+"')"
+
+    def __add__(self, rhs):
+        """ Concatenates two arb bit objects with all format and val.
+        """
+        ret = ArbBitField.__new__(ArbBitField)
+        ret.fmt = self.fmt + rhs.fmt
+        ret._widths = np.concatenate((self._widths, rhs._widths))
+        ret._widths_sum = self._widths_sum + rhs._widths_sum
+        ret._init_fmt_caches_()
+        ret._vals = np.concatenate((self._vals, rhs._vals))
+        ret._val_str = None
+        return ret
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [int(v) for v in self._vals[key]]
+        return int(self._vals[key])
+
+    def __setitem__(self, key, val_c):
+        val_c = val_c.upper()
+        if not _LEGAL_VAL.issuperset(val_c):    # junk must never reach _vals,
+            # or repr() stops eval-round-tripping
+            raise ValueError('illegal value chars in %r' % val_c)
+        if isinstance(key, slice):
+            assert len(self._vals[key]) == len(val_c)
+            self._vals[key] = np.frombuffer(val_c.encode('ascii').translate(_CHARS_TO_INTS),
+                                            dtype=np.uint8)
+        else:                           # fast path: one field, one char
+            assert len(val_c) == 1
+            self._vals[key] = _CHAR_TO_INT[val_c]
+        self._val_str = None            # text form is stale; rebuild on demand
+
+    def __len__(self):
+        return len(self.fmt)
+
+    def get_int(self):
+        """ all fields packed into one int, first field in the top bits.
+            Handy as a whole-register image for hardware writes.
+        """
+        ret = 0
+        # tolist() so the accumulator stays a Python int of any size
+        # instead of collapsing to a wrapping uint8
+        for count, vint in zip(self._widths.tolist(), self._vals.tolist()):
+            ret = (ret << count) | (vint & _WIDTH_MASK[count])
+        return ret
+
+    def set_int(self, value):
+        """ distribute one packed int across the fields; the last field
+            takes the low bits. Extra high bits are dropped.
+        """
+        widths = self._widths.tolist()  # Python ints: shifting a big
+        vals = np.empty(len(widths), dtype=np.uint8)    # value by a uint8 would overflow
+        for idx in range(len(widths)-1, -1, -1):
+            count = widths[idx]
+            vals[idx] = value & _WIDTH_MASK[count]
+            value >>= count
+        self._vals = vals
+        self._val_str = None
+
+    int_value = property(get_int, set_int)
+
+    def __int__(self):
+        return self.get_int()
+
+    def bool(self, rev_bits=False, rev_fields=False):
+        """ returns a list of bools; Options to reverse bit-wise and field-wise.
+            Normal order is left to right fields and MSB to LSB bits
+        """
+        if rev_fields:
+            tmp_widths, tmp_vals, mask = self._widths_rev, self._vals[::-1], self._lane_mask_rev
+        else:
+            tmp_widths, tmp_vals, mask = self._widths, self._vals, self._lane_mask
+        if _fast is not None:
+            return _fast.unpack_bools(tmp_widths, tmp_vals, rev_bits)
+        if rev_bits:                    # reverse is LSB to MSB
+            # mirroring each lane through _REV8 leaves the field's LSB at
+            # the top, so both orders unpack the same way from here on
+            lanes = _REV8[tmp_vals & _WIDTH_MASK_ARR[tmp_widths]]
+        else:                           # normal is MSB to LSB
+            # shift each value to the top of its lane so col 0 is its MSB
+            lanes = (tmp_vals << (8 - tmp_widths)).astype(np.uint8)
+        bits = np.unpackbits(lanes).reshape(-1, 8)
+        # keep the first width columns of each lane; over-wide values are
+        # truncated to their low bits just as the old shift loop did
+        return bits[mask].astype(bool).tolist()
+
+
+    def set_bool(self, b_lst, rev_bits=False, rev_fields=False):
+        """ sets val from a list of bools (read from the hardware, e.g.)
+            Normal input order is left to right fields and MSB to LSB bits
+        """
+        if rev_fields:
+            tmp_widths, mask = self._widths_rev, self._lane_mask_rev
+        else:
+            tmp_widths, mask = self._widths, self._lane_mask
+        if isinstance(b_lst, np.ndarray):
+            bits = b_lst.astype(np.uint8, copy=False)
+        else:
+            try:
+                # bools are ints, so a list of them is one C-level copy away
+                # from a byte buffer -- no per-element conversion loop
+                bits = np.frombuffer(bytes(b_lst), dtype=np.uint8)
+            except TypeError:
+                # np.bool_ and friends refuse bytes(); let numpy convert
+                bits = np.asarray(b_lst, dtype=np.uint8)
+        if len(bits) != self._widths_sum:       # one bool per bit; a short
+            # buffer must never reach the unchecked C kernel
+            raise ValueError('set_bool needs %d bools, got %d'
+                             % (self._widths_sum, len(bits)))
+        if _fast is not None:
+            vals = np.frombuffer(_fast.pack_bools(tmp_widths, bits, rev_bits),
+                                 dtype=np.uint8)
+            self._vals = vals[::-1].copy() if rev_fields else vals
+            self._val_str = None
+            return
+        # scatter the incoming bits into one 8-bit lane per field, then
+        # pack each lane back to a byte in a single C-level np.packbits
+        lanes = np.zeros((len(tmp_widths), 8), dtype=np.uint8)
+        lanes[mask] = bits
+        packed = np.packbits(lanes.ravel())
+        if rev_bits:                    # incoming bits are LSB to MSB
+            # bits sit at the top of each lane; mirroring the lane drops
+            # them to the bottom in MSB-to-LSB order, i.e. the field value
+            vals = _REV8[packed]
+        else:                           # incoming bits are MSB to LSB
+            vals = (packed >> (8 - tmp_widths)).astype(np.uint8)
+        self._vals = vals[::-1].copy() if rev_fields else vals
+        self._val_str = None
+
+
+def batch_bool(fields, rev_bits=False, rev_fields=False):
+    """ bool() over many ArbBitField instances at once: returns a 2D bool
+        array, one row per instance, one column per bit. All instances
+        must share a format. Handy for bulk hardware reads/writes where
+        looping field.bool() per register dominates the I/O loop.
+    """
+    first = fields[0]
+    assert all(f.fmt == first.fmt for f in fields)
+    if rev_fields:
+        tmp_widths, mask = first._widths_rev, first._lane_mask_rev
+    else:
+        tmp_widths, mask = first._widths, first._lane_mask
+    vals = np.stack([f._vals for f in fields])
+    if rev_fields:
+        vals = vals[:, ::-1]
+    if rev_bits:
+        lanes = _REV8[vals & _WIDTH_MASK_ARR[tmp_widths]]
+    else:
+        lanes = (vals << (8 - tmp_widths)).astype(np.uint8)
+    bits = np.unpackbits(lanes, axis=1)
+    return bits[:, mask.ravel()].astype(bool)
+
+
+def batch_set_bool(fields, bits, rev_bits=False, rev_fields=False):
+    """ set_bool() over many ArbBitField instances at once; bits is any
+        2D-shapeable sequence, one row of bools per instance.
+    """
+    first = fields[0]
+    assert all(f.fmt == first.fmt for f in fields)
+    if rev_fields:
+        tmp_widths, mask = first._widths_rev, first._lane_mask_rev
+    else:
+        tmp_widths, mask = first._widths, first._lane_mask
+    bits = np.asarray(bits, dtype=np.uint8).reshape(len(fields), first._widths_sum)
+    lanes = np.zeros((len(fields), len(tmp_widths), 8), dtype=np.uint8)
+    lanes[:, mask] = bits
+    packed = np.packbits(lanes.reshape(len(fields), -1), axis=1)
+    if rev_bits:
+        vals = _REV8[packed]
+    else:
+        vals = (packed >> (8 - tmp_widths)).astype(np.uint8)
+    if rev_fields:
+        vals = vals[:, ::-1]
+    for field, row in zip(fields, vals):
+        field._vals = row.copy()
+        field._val_str = None
+
+
+def bool_to_str(b_lst, zero_val=' '):
+    """  Handy formatter from list of bools to text
+    """
+    return ''.join('1' if b_val else zero_val for b_val in b_lst)
+
+if __name__ == '__main__':
+    print('*'*72)
+    print('*'*30, 'Begin Test', '*'*30)
+    print('*'*72)
+    X = ArbBitField('34', '31')
+    Y = ArbBitField('55', '5b')
+    Z = X+Y
+
+    print('X %30s'%X, '%r'%X)
+    print('Y %30s'%Y, '%r'%Y)
+    print('Z %30s'%Z, '%r'%Z)
+    print('Z[1:3] %25s'%Z[1:3], '%r'%Z)
+    Z[1:3] = '24'
+    print('put 24 inthe middle of Z:')
+    print('Z %30s'%Z, repr(Z))
+
+    print('Z in decimal:', ' '.join(['%d'%Z[i] for i in range(len(Z))]))
+    print('\nY %30s'%Y, '%r'%Y)
+
+
+    print(bool_to_str(Y.bool()))
+    print(bool_to_str(Y.bool(rev_bits=True)), 'Y rev_bits')
+    print(bool_to_str(Y.bool(rev_fields=True)), 'Y rev_fields')
+    print(bool_to_str(Y.bool(rev_fields=True, rev_bits=True)), 'Y both')
+
+    T = ArbBitField('34', '3b')
+    T_SET = [False, False, True, True, True, False, True,]
+    print(''.join(['%s'%('1' if i else '0') for i in T_SET]), 'T_SET')
+    T.set_bool(T_SET)
+    print('T %30s'%T, '%r'%T)
+    T.set_bool(T_SET, rev_bits=True)
+    print('T %30s'%T, '%r'%T, 'bits')
+    T.set_bool(T_SET, rev_fields=True)
+    print('T %30s'%T, '%r'%T, 'fields')
+    T.set_bool(T_SET, rev_fields=True, rev_bits=True)
+    print('T %30s'%T, '%r'%T, 'both')
+    T.set_bool(T_SET)
+    print('T %30s'%T, '%r'%T, 'none')
+
+    U = ArbBitField('345', '1AB')
+    U_INT = int(U)
+    print('U %30s'%U, '%r'%U, 'as int %d'%U_INT)
+    U.set_val(None)
+    U.set_int(U_INT)
+    print('U %30s'%U, '%r'%U, 'int round trip')
+    assert int(U) == U_INT
+
+    print('-'*30, ' test done', '-'*30)
@@ -0,0 +1,84 @@
+#! /usr/bin/env python
+# encoding: utf-8
+#cython: boundscheck=False, wraparound=False
+""" Optional C accelerator for the ArbBitField hot paths.
+    Build in place with:  python setup.py build_ext --inplace
+    ArbBitField falls back to its pure-Python paths when the built
+    module is absent, so building this is never required.
+    widths/vals/bits args are uint8 buffers (numpy arrays work as-is).
+"""
+
+
+def to_bin(int width, int value, bint rev_bits):
+    """ one field as a str of 1s and 0s, LSB first when rev_bits """
+    cdef bytearray out = bytearray(width)
+    cdef int bit_n
+    for bit_n in range(width):
+        if rev_bits:
+            out[bit_n] = 0x30 | ((value >> bit_n) & 1)
+        else:
+            out[bit_n] = 0x30 | ((value >> (width - 1 - bit_n)) & 1)
+    return out.decode('ascii')
+
+
+def render_str(const unsigned char[:] widths, const unsigned char[:] vals):
+    """ all fields as 1s and 0s with a space between fields (__str__) """
+    cdef Py_ssize_t n = widths.shape[0]
+    cdef Py_ssize_t idx, pos = 0
+    cdef int width, value, bit_n, total = 0
+    for idx in range(n):
+        total += widths[idx] + 1
+    if total == 0:
+        return ''
+    cdef bytearray out = bytearray(total - 1)
+    for idx in range(n):
+        if idx:
+            out[pos] = 0x20
+            pos += 1
+        width = widths[idx]
+        value = vals[idx]
+        for bit_n in range(width):
+            out[pos + bit_n] = 0x30 | ((value >> (width - 1 - bit_n)) & 1)
+        pos += width
+    return out.decode('ascii')
+
+
+def unpack_bools(const unsigned char[:] widths, const unsigned char[:] vals,
+                 bint rev_bits):
+    """ list of bools, one per bit, in field order (bool) """
+    cdef Py_ssize_t n = widths.shape[0]
+    cdef Py_ssize_t idx
+    cdef int width, value, bit_n
+    cdef list ret = []
+    for idx in range(n):
+        width = widths[idx]
+        value = vals[idx]
+        if rev_bits:
+            for bit_n in range(width):
+                ret.append(True if (value >> bit_n) & 1 else False)
+        else:
+            for bit_n in range(width):
+                ret.append(True if (value >> (width - 1 - bit_n)) & 1 else False)
+    return ret
+
+
+def pack_bools(const unsigned char[:] widths, const unsigned char[:] bits,
+               bint rev_bits):
+    """ one value byte per field from a flat bit buffer (set_bool) """
+    cdef Py_ssize_t n = widths.shape[0]
+    cdef Py_ssize_t idx, offset = 0
+    cdef int width, value, bit_n
+    cdef bytearray vals = bytearray(n)
+    for idx in range(n):
+        width = widths[idx]
+        value = 0
+        if rev_bits:
+            for bit_n in range(width):
+                # any nonzero byte is True, matching the numpy path
+                value |= (1 if bits[offset + bit_n] != 0 else 0) << bit_n
+        else:
+            for bit_n in range(width):
+                value = (value << 1) | (1 if bits[offset + bit_n] != 0 else 0)
+        vals[idx] = value
+        offset += width
+    return vals
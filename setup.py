@@ -0,0 +1,15 @@
+#! /usr/bin/env python
+# encoding: utf-8
+""" Builds the optional _fast accelerator for ArbBitField:
+        python setup.py build_ext --inplace
+    ArbBitField works without it; this just speeds up the hot paths.
+"""
+
+from setuptools import setup
+
+from Cython.Build import cythonize
+
+setup(
+    name='arb-bit-field',
+    ext_modules=cythonize('_fast.pyx'),
+)